@@ -1,12 +1,15 @@
 import os
 import time
+import asyncio
 import logging
-from datetime import datetime
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from groq import Groq
+from groq import AsyncGroq, APIConnectionError, RateLimitError
 from dotenv import load_dotenv
-import requests
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+import httpx
+import orjson
 
 # Load environment variables
 load_dotenv()
@@ -26,18 +29,130 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 # Initialize FastAPI app
-app = FastAPI(title="Generative AI Service", version="1.0.0")
+app = FastAPI(title="Generative AI Service", version="1.0.0", default_response_class=ORJSONResponse)
 
-# Initialize Groq client
-groq_client = None
+# Shared HTTP client for Groq REST calls (keep-alive pool, no per-request setup)
+http_client = httpx.AsyncClient(
+    base_url="https://api.groq.com",
+    timeout=10.0,
+    limits=httpx.Limits(max_keepalive_connections=20, max_connections=50)
+)
+
+# In-process TTL cache for the /models payload (the model list is near-static).
+# The payload is stored pre-serialized so cache hits do zero Python work.
+MODELS_CACHE_TTL = 60.0
+MODELS_EXCLUDED_KEYWORDS = ("whisper", "tts", "guard")
+_models_cache = {"expiry": 0.0, "payload": None, "refreshing": False, "task": None}
+
+async def _refresh_models_cache():
+    headers = {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+    response = await http_client.get("/openai/v1/models", headers=headers)
+    response.raise_for_status()
+
+    models_data = response.json()
+
+    # Extract text-model information, skipping audio/guard models like setup.py
+    available_models = [
+        {
+            "id": model.get("id"),
+            "owned_by": model.get("owned_by"),
+            "active": model.get("active"),
+            "context_window": model.get("context_window"),
+            "max_completion_tokens": model.get("max_completion_tokens")
+        }
+        for model in models_data.get("data", ())
+        if (lid := (model.get("id") or "").lower())
+        and MODELS_EXCLUDED_KEYWORDS[0] not in lid
+        and MODELS_EXCLUDED_KEYWORDS[1] not in lid
+        and MODELS_EXCLUDED_KEYWORDS[2] not in lid
+    ]
+
+    result = {
+        "object": models_data.get("object"),
+        "data": available_models,
+        "current_model": GROQ_MODEL,
+        "total_models": len(available_models)
+    }
+
+    _models_cache["payload"] = orjson.dumps(result)
+    _models_cache["expiry"] = time.monotonic() + MODELS_CACHE_TTL
+
+    logger.info("✓ Models cache refreshed: %s models", len(available_models))
+
+async def _refresh_models_cache_background():
+    try:
+        await _refresh_models_cache()
+    except Exception as e:
+        logger.error("✗ Models cache refresh failed: %s", e)
+    finally:
+        _models_cache["refreshing"] = False
+
+@app.on_event("startup")
+async def warm_models_cache():
+    try:
+        await _refresh_models_cache()
+    except Exception as e:
+        logger.error("✗ Models cache warmup failed: %s", e)
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await http_client.aclose()
+
+# Initialize Groq client once at startup so misconfiguration fails fast
+# and handlers skip the lazy-init branch entirely
+@app.on_event("startup")
+async def init_groq_client():
+    if not GROQ_API_KEY:
+        raise RuntimeError("GROQ_API_KEY not configured")
+    app.state.groq = AsyncGroq(api_key=GROQ_API_KEY)
+
+# Circuit breaker: after enough consecutive failures, fail /chat fast for
+# a cooldown window instead of tying every worker slot to a doomed upstream call
+CIRCUIT_FAIL_THRESHOLD = 5
+CIRCUIT_OPEN_SECONDS = 10.0
+_circuit = {"fails": 0, "open_until": 0.0}
 
-def get_groq_client():
-    global groq_client
-    if groq_client is None:
-        if not GROQ_API_KEY:
-            raise HTTPException(status_code=500, detail="GROQ_API_KEY not configured")
-        groq_client = Groq(api_key=GROQ_API_KEY)
-    return groq_client
+def _check_circuit():
+    if time.monotonic() < _circuit["open_until"]:
+        raise HTTPException(status_code=503, detail="Groq API temporarily unavailable")
+
+def _record_success():
+    _circuit["fails"] = 0
+
+def _record_failure():
+    _circuit["fails"] += 1
+    if _circuit["fails"] > CIRCUIT_FAIL_THRESHOLD:
+        _circuit["open_until"] = time.monotonic() + CIRCUIT_OPEN_SECONDS
+
+@retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential_jitter(0.2, 2.0),
+    retry=retry_if_exception_type((APIConnectionError, RateLimitError)),
+    reraise=True
+)
+async def _create_completion(client, **kwargs):
+    return await client.chat.completions.create(**kwargs)
+
+# Freelist of single-message `messages` lists so the /chat hot path
+# reuses the list/dict shells instead of allocating them per request
+_msg_pool = []
+
+def _acquire_messages(content):
+    if _msg_pool:
+        messages = _msg_pool.pop()
+        messages[0]["content"] = content
+    else:
+        messages = [{"role": "user", "content": content}]
+    return messages
+
+def _release_messages(messages):
+    if len(_msg_pool) < 1024:
+        messages[0]["content"] = ""
+        _msg_pool.append(messages)
 
 # Pydantic models
 class ChatRequest(BaseModel):
@@ -50,21 +165,18 @@ class ChatResponse(BaseModel):
     model: str
     tokens_used: int
     response_time: float
-    timestamp: datetime
-
-class HealthResponse(BaseModel):
-    status: str
-    timestamp: datetime
+    timestamp: float
 
 # API Endpoints
-@app.get("/health", response_model=HealthResponse)
+@app.get("/health")
 async def health_check(request: Request):
     client_ip = request.client.host
-    logger.info(f"• HEALTH CHECK - Client: {client_ip}")
-    
-    response = HealthResponse(status="healthy", timestamp=datetime.now())
-    logger.info(f"✓ Health response: {response.status}")
-    return response
+    logger.info("• HEALTH CHECK - Client: %s", client_ip)
+
+    # Plain dict through ORJSONResponse - no Pydantic validation on a
+    # handler that exists to be fast
+    logger.info("✓ Health response: healthy")
+    return {"status": "healthy", "timestamp": time.time()}
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat_completion(request: ChatRequest, req: Request):
@@ -72,97 +184,151 @@ async def chat_completion(request: ChatRequest, req: Request):
     client_ip = req.client.host
     
     # Log incoming request
-    logger.info(f"• CHAT REQUEST - Client: {client_ip}")
-    logger.info(f"• Message: {request.message[:100]}{'...' if len(request.message) > 100 else ''}")
-    logger.info(f"• Config - Model: {GROQ_MODEL}, Tokens: {request.max_tokens or MAX_TOKENS}, Temp: {request.temperature or TEMPERATURE}")
-    
+    logger.info("• CHAT REQUEST - Client: %s", client_ip)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("• Message: %s%s", request.message[:100], "..." if len(request.message) > 100 else "")
+        logger.info("• Config - Model: %s, Tokens: %s, Temp: %s", GROQ_MODEL, request.max_tokens or MAX_TOKENS, request.temperature or TEMPERATURE)
+
+    _check_circuit()
+
     try:
-        client = get_groq_client()
-        
+        client = req.app.state.groq
+
         max_tokens = request.max_tokens or MAX_TOKENS
         temperature = request.temperature or TEMPERATURE
         
-        completion = client.chat.completions.create(
-            model=GROQ_MODEL,
-            messages=[{"role": "user", "content": request.message}],
-            max_tokens=max_tokens,
-            temperature=temperature,
-            stream=False
-        )
-        
+        messages = _acquire_messages(request.message)
+        try:
+            stream = await _create_completion(
+                client,
+                model=GROQ_MODEL,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+        except Exception:
+            _record_failure()
+            raise
+        else:
+            _record_success()
+        finally:
+            _release_messages(messages)
+
+        # Consume the stream into a full response so /chat keeps its contract
+        chunks = []
+        tokens_used = 0
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                chunks.append(chunk.choices[0].delta.content)
+            x_groq = getattr(chunk, "x_groq", None)
+            if x_groq and x_groq.usage:
+                tokens_used = x_groq.usage.total_tokens
+
         response_time = time.time() - start_time
-        ai_response = completion.choices[0].message.content
-        
+        ai_response = "".join(chunks)
+
         # Log response details
-        logger.info(f"✓ Response time: {response_time:.3f}s")
-        logger.info(f"✓ Tokens used: {completion.usage.total_tokens}")
-        logger.info(f"✓ AI response: {ai_response[:200]}{'...' if len(ai_response) > 200 else ''}")
-        
+        logger.info("✓ Response time: %.3fs", response_time)
+        logger.info("✓ Tokens used: %s", tokens_used)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("✓ AI response: %s%s", ai_response[:200], "..." if len(ai_response) > 200 else "")
+
         return ChatResponse(
             response=ai_response,
             model=GROQ_MODEL,
-            tokens_used=completion.usage.total_tokens,
+            tokens_used=tokens_used,
             response_time=response_time,
-            timestamp=datetime.now()
+            timestamp=time.time()
         )
-        
+
     except Exception as e:
-        logger.error(f"✗ CHAT ERROR - Client: {client_ip}, Error: {str(e)}")
+        logger.error("✗ CHAT ERROR - Client: %s, Error: %s", client_ip, e)
+        raise HTTPException(status_code=500, detail=f"AI response failed: {str(e)}")
+
+@app.post("/chat/stream")
+async def chat_completion_stream(request: ChatRequest, req: Request):
+    """Stream completion tokens as they arrive, cutting time-to-first-byte"""
+    client_ip = req.client.host
+
+    logger.info("• CHAT STREAM REQUEST - Client: %s", client_ip)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("• Message: %s%s", request.message[:100], "..." if len(request.message) > 100 else "")
+
+    _check_circuit()
+
+    try:
+        client = req.app.state.groq
+
+        messages = _acquire_messages(request.message)
+        try:
+            stream = await _create_completion(
+                client,
+                model=GROQ_MODEL,
+                messages=messages,
+                max_tokens=request.max_tokens or MAX_TOKENS,
+                temperature=request.temperature or TEMPERATURE,
+                stream=True
+            )
+        except Exception:
+            _record_failure()
+            raise
+        else:
+            _record_success()
+        finally:
+            _release_messages(messages)
+
+        async def gen():
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
+        return StreamingResponse(gen(), media_type="text/plain")
+
+    except Exception as e:
+        logger.error("✗ CHAT STREAM ERROR - Client: %s, Error: %s", client_ip, e)
         raise HTTPException(status_code=500, detail=f"AI response failed: {str(e)}")
 
 @app.get("/models")
 async def get_available_models(request: Request):
-    """Get list of available models from Groq API"""
+    """Serve the pre-serialized model list, refreshing it in the background"""
     client_ip = request.client.host
-    start_time = time.time()
-    
-    logger.info(f"• MODELS REQUEST - Client: {client_ip}")
-    
+
+    logger.info("• MODELS REQUEST - Client: %s", client_ip)
+
+    cached = _models_cache["payload"]
+    if cached is not None:
+        # Stale caches are served immediately; a background task refreshes
+        # them so no request ever blocks on the upstream hop
+        if time.monotonic() >= _models_cache["expiry"] and not _models_cache["refreshing"]:
+            _models_cache["refreshing"] = True
+            # Keep a strong reference: the loop only holds tasks weakly, and a
+            # collected task would leave the refreshing flag stuck True
+            _models_cache["task"] = asyncio.create_task(_refresh_models_cache_background())
+        return Response(content=cached, media_type="application/json")
+
+    # No cache yet (warmup failed) - fetch inline
     try:
-        url = "https://api.groq.com/openai/v1/models"
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        models_data = response.json()
-        
-        # Extract model information
-        available_models = []
-        for model in models_data.get("data", []):
-            model_info = {
-                "id": model.get("id"),
-                "owned_by": model.get("owned_by"),
-                "active": model.get("active"),
-                "context_window": model.get("context_window"),
-                "max_completion_tokens": model.get("max_completion_tokens")
-            }
-            available_models.append(model_info)
-        
-        response_time = time.time() - start_time
-        result = {
-            "object": models_data.get("object"),
-            "data": available_models,
-            "current_model": GROQ_MODEL,
-            "total_models": len(available_models)
-        }
-        
-        logger.info(f"✓ Models response time: {response_time:.3f}s")
-        logger.info(f"✓ Models found: {len(available_models)} models")
-        logger.info(f"• Current model: {GROQ_MODEL}")
-        
-        return result
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"✗ MODELS API ERROR - Client: {client_ip}, Error: {str(e)}")
+        await _refresh_models_cache()
+        return Response(content=_models_cache["payload"], media_type="application/json")
+
+    except httpx.HTTPError as e:
+        logger.error("✗ MODELS API ERROR - Client: %s, Error: %s", client_ip, e)
         raise HTTPException(status_code=503, detail=f"Unable to fetch models from Groq API: {str(e)}")
     except Exception as e:
-        logger.error(f"✗ MODELS ERROR - Client: {client_ip}, Error: {str(e)}")
+        logger.error("✗ MODELS ERROR - Client: %s, Error: %s", client_ip, e)
         raise HTTPException(status_code=500, detail=f"Failed to retrieve models: {str(e)}")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    if os.getenv("DEV") == "1":
+        uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    else:
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            loop="uvloop",
+            http="httptools",
+            workers=int(os.getenv("WORKERS", os.cpu_count() or 1))
+        )
\ No newline at end of file
@@ -4,6 +4,9 @@ import sys
 import subprocess
 import requests
 
+# Keywords identifying non-text models to skip in the picker
+EXCLUDED_KEYWORDS = ("whisper", "tts", "guard")
+
 def main():
     print("• Setup")
     print("="*50)
@@ -44,9 +47,11 @@ def main():
     
     # Filter and show models
     print("\n• Available Models:")
-    text_models = [m for m in models_data.get("data", []) 
-                   if not any(x in m.get("id", "").lower() 
-                             for x in ["whisper", "tts", "guard"])]
+    text_models = [m for m in models_data.get("data", ())
+                   if (lid := m.get("id", "").lower())
+                   and EXCLUDED_KEYWORDS[0] not in lid
+                   and EXCLUDED_KEYWORDS[1] not in lid
+                   and EXCLUDED_KEYWORDS[2] not in lid]
     
     for i, model in enumerate(text_models[:10], 1):  # Show top 10
         print(f"{i:2d}. {model['id']} ({model.get('owned_by', 'Unknown')})")